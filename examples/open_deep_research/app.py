@@ -1,9 +1,12 @@
 # === app.py ===
 
 import os
+import queue
+import threading
 import gradio as gr
-from run import create_agent, agent_logs, log_lock
+from run import create_agent, agent_logs
 from smolagents.gradio_ui import GradioUI  # Ensure this is the correct import based on smolagents' version
+from smolagents.memory import ActionStep
 
 # Simple dark theme styling.
 CSS = """
@@ -21,6 +24,15 @@ h1, h2, h3 {
 }
 """
 
+# Interval at which new logs are sent to the browser while the agent runs, in seconds
+LOG_FLUSH_INTERVAL = 0.1
+
+# Marks the end of an agent run in the queue of streamed steps
+_RUN_FINISHED = object()
+
+# The agent is shared by all sessions, so only one run may use it at a time
+_agent_run_lock = threading.Lock()
+
 def set_keys(openai_api_key, serper_api_key, hf_token):
     """
     Update environment variables with the user-provided API keys.
@@ -63,15 +75,61 @@ def build_app():
         log_textbox = gr.Textbox(label="Agent Logs", lines=20, interactive=False)
         log_textbox.style(container=False)  # Optional: Improve aesthetics
         
-        # Function to get the answer and logs
+        # Function to stream progress and logs while the agent runs, then the final answer
         def get_answer(question):
-            with log_lock:
-                agent_logs.clear()  # Clear previous logs
-            answer = agent.run(question)
-            with log_lock:
-                logs = "\n".join(agent_logs)
-            return answer, logs
-        
+            steps = queue.Queue()
+            started = threading.Event()
+            stop_requested = threading.Event()
+
+            # Run the agent in a worker thread, so logs emitted during a step can be flushed without waiting for it
+            def run_agent():
+                with _agent_run_lock:
+                    agent_logs.clear()  # Clear previous logs
+                    started.set()
+                    run = None
+                    try:
+                        run = agent.run(question, stream=True)
+                        for step in run:
+                            steps.put(step)
+                            if stop_requested.is_set():
+                                break
+                    except Exception as e:
+                        steps.put(e)
+                    finally:
+                        if run is not None:
+                            run.close()
+                        steps.put(_RUN_FINISHED)
+
+            threading.Thread(target=run_agent, daemon=True).start()
+
+            progress, answer, sent_logs = "Working...", None, None
+            try:
+                while True:
+                    try:
+                        step = steps.get(timeout=LOG_FLUSH_INTERVAL)
+                    except queue.Empty:
+                        step = None
+                    if step is _RUN_FINISHED:
+                        break
+                    if isinstance(step, Exception):
+                        raise step
+                    if isinstance(step, ActionStep):
+                        progress = f"Working... completed step {step.step_number}."
+                    elif step is not None:
+                        answer = step
+                        continue
+                    if not started.is_set():
+                        continue  # Still waiting for another session's run to finish
+                    logs = "\n".join(list(agent_logs))  # Snapshot, the listener thread may still be appending
+                    # The whole textbox is re-sent on each update, so only send one when something changed
+                    if step is not None or logs != sent_logs:
+                        sent_logs = logs
+                        yield progress, logs
+                yield answer, "\n".join(list(agent_logs))
+            finally:
+                # Stop the agent after its current step if the generator is closed (cancel, disconnect, new submit)
+                stop_requested.set()
+
         # Ask Question Section
         gr.Markdown("### Ask your question below:")
         question_input = gr.Textbox(label="Your Question", placeholder="Enter your question here...")
@@ -81,7 +139,8 @@ def build_app():
         submit_btn.click(
             fn=get_answer,
             inputs=question_input,
-            outputs=[answer_output, log_textbox]
+            outputs=[answer_output, log_textbox],
+            queue=True,
         )
         
     return demo
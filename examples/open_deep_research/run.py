@@ -1,15 +1,25 @@
 # === run.py ===
 
 import argparse
+import atexit
+import logging
 import os
+import queue
 import threading
-import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 
+import requests
+import requests_cache
 from dotenv import load_dotenv
 from huggingface_hub import login
+from requests.adapters import HTTPAdapter
 from scripts.text_inspector_tool import TextInspectorTool
 from scripts.text_web_browser import (
     ArchiveSearchTool,
+    BatchVisitTool,
+    CachedGoogleSearchTool,
     FinderTool,
     FindNextTool,
     PageDownTool,
@@ -18,10 +28,10 @@ from scripts.text_web_browser import (
     VisitTool,
 )
 from scripts.visual_qa import visualizer
+from urllib3.util.retry import Retry
 
 from smolagents import (
     CodeAgent,
-    GoogleSearchTool,
     LiteLLMModel,
     ToolCallingAgent,
     ToolCollection,
@@ -31,46 +41,108 @@ from mcp import StdioServerParameters
 
 # ------------------------ Configuration & Initialization ------------------------
 
-# Initialize logging
+# Load environment variables
+load_dotenv(override=True)
+
+# Initialize logging: for the UI buffer, agent threads only enqueue records and a QueueListener thread formats them
 logger = logging.getLogger("smolagents")
-logger.setLevel(logging.DEBUG)  # Capture all levels of logs
-log_handler = logging.StreamHandler()
+LOG_LEVEL = os.getenv("SMOLAGENTS_LOG_LEVEL", "INFO").upper()  # Set to DEBUG to capture all levels of logs
+# getLevelName maps known level names to their number (getLevelNamesMapping is only available from Python 3.11)
+if not isinstance(logging.getLevelName(LOG_LEVEL), int):
+    logger.warning(f"Unknown SMOLAGENTS_LOG_LEVEL={LOG_LEVEL!r}, using INFO instead.")
+    LOG_LEVEL = "INFO"
+logger.setLevel(LOG_LEVEL)
+# Keep chatty HTTP and LLM client libraries quiet; they log through their own loggers, not "smolagents"
+logging.getLogger("urllib3").setLevel(logging.WARNING)
+logging.getLogger("LiteLLM").setLevel(logging.WARNING)
+
+
+def positive_int(value):
+    """
+    Argparse type for strictly positive integers.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+
+def positive_int_from_env(name, default):
+    """
+    Read a strictly positive integer from the environment, falling back to the default if unset or invalid.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return positive_int(value)
+    except argparse.ArgumentTypeError:
+        logger.warning(f"Ignoring invalid {name}={value!r}, using {default} instead.")
+        return default
+
+
 log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-log_handler.setFormatter(log_formatter)
-logger.addHandler(log_handler)
 
-# Define a thread-safe list to store logs
-agent_logs = []
-log_lock = threading.Lock()
+# Bounded in-memory log buffer read by the UI
+AGENT_LOGS_MAXLEN = positive_int_from_env("AGENT_LOGS_MAXLEN", 4096)  # Caps memory on long-running deployments
+LOG_QUEUE_MAXSIZE = 8192
+agent_logs = deque(maxlen=AGENT_LOGS_MAXLEN)
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread and drops records when the queue is full,
+    so logging never blocks the agent.
+    """
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
 
 class ListHandler(logging.Handler):
     """
-    Custom logging handler to append logs to a list.
+    Custom logging handler to append logs to a list. Only called from the QueueListener thread.
     """
     def __init__(self, log_list):
         super().__init__()
         self.log_list = log_list
 
     def emit(self, record):
-        with log_lock:
-            log_entry = self.format(record)
-            self.log_list.append(log_entry)
+        self.log_list.append(self.format(record))
+
 
-# Attach the custom handler to capture logs
+# The console handler writes synchronously so nothing is lost at exit; only the UI buffer goes through the queue
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(log_formatter)
+logger.addHandler(log_handler)
 list_handler = ListHandler(agent_logs)
 list_handler.setFormatter(log_formatter)
-logger.addHandler(list_handler)
+logger.addHandler(DroppingQueueHandler(_log_queue))
+
+log_listener = QueueListener(_log_queue, list_handler, respect_handler_level=True)
+log_listener.start()
+
+
+def _stop_log_listener():
+    """
+    Flush the queued records into the buffer at exit. The listener's sentinel cannot be enqueued on a full queue.
+    """
+    try:
+        log_listener.stop()
+    except queue.Full:
+        pass
 
-# Load environment variables
-load_dotenv(override=True)
 
-# Authenticate with Hugging Face Hub
-hf_token = os.getenv("HF_TOKEN")
-if hf_token:
-    login(hf_token)
-    logger.info("Logged into Hugging Face Hub.")
-else:
-    logger.warning("HF_TOKEN not found. Proceeding without authentication.")
+atexit.register(_stop_log_listener)
 
 # Define MCP server parameters with the custom endpoint
 server_parameters = StdioServerParameters(
@@ -84,7 +156,8 @@ server_parameters = StdioServerParameters(
 )
 
 
-# Define authorized imports to limit agent capabilities
+# Define authorized imports to limit agent capabilities.
+# These are only imported when the agent's code actually uses them, so they add no startup cost.
 AUTHORIZED_IMPORTS = [
     "requests",
     "zipfile",
@@ -94,16 +167,12 @@ AUTHORIZED_IMPORTS = [
     "sympy",
     "json",
     "bs4",
-    "pubchempy",
     "xml",
-    "yahoo_finance",
     "Bio",
     "sklearn",
     "scipy",
-    "pydub",
     "io",
     "PIL",
-    "chess",
     "PyPDF2",
     "pptx",
     "torch",
@@ -112,6 +181,26 @@ AUTHORIZED_IMPORTS = [
     "csv",
 ]
 
+# Rarely needed imports, only authorized with the "extended" import profile
+EXTENDED_AUTHORIZED_IMPORTS = AUTHORIZED_IMPORTS + [
+    "pubchempy",
+    "yahoo_finance",
+    "pydub",
+    "chess",
+]
+
+IMPORT_PROFILES = {
+    "default": AUTHORIZED_IMPORTS,
+    "extended": EXTENDED_AUTHORIZED_IMPORTS,
+}
+
+# Additional instructions appended to the search agent's managed-agent task prompt
+MANAGED_AGENT_TASK_SUFFIX = (
+    " You can navigate to .txt online files.\n"
+    "            If a non-HTML page is in another format, especially .pdf or a YouTube video, use the 'inspect_file_as_text' tool to inspect it.\n"
+    "            Additionally, if more information is needed to answer the question after some searching, use `final_answer` with your request for clarification as an argument."
+)
+
 # User-Agent string for web requests to simulate a real browser
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -126,17 +215,58 @@ BROWSER_CONFIG = {
     "request_kwargs": {
         "headers": {"User-Agent": USER_AGENT},
         "timeout": 150,        # Reduced timeout from 300 to 150 seconds
-        "max_retries": 2,      # Limit retries to prevent long wait times
     },
     "serpapi_key": os.getenv("SERPAPI_API_KEY"),
 }
 
-# Ensure the downloads folder exists
-os.makedirs(f"./{BROWSER_CONFIG['downloads_folder']}", exist_ok=True)
+# Connection pool and retry settings shared by all browser tools; the pool is sized for the concurrent page fetches
+FETCH_WORKERS = positive_int_from_env("FETCH_WORKERS", 8)
+HTTP_MAX_RETRIES = 2  # Limit retries to prevent long wait times
+
+# HTTP cache so fetched pages can be reused (and, on disk, survive restarts); honours Cache-Control headers
+CACHE_BACKENDS = ["sqlite", "filesystem", "memory", "none"]
+WEB_CACHE_NAME = os.path.join(BROWSER_CONFIG["downloads_folder"], "web_cache")  # sqlite appends ".sqlite"
+WEB_CACHE_EXPIRE_AFTER = 3600  # Seconds
 
 # Define custom role conversions for the model
 custom_role_conversions = {"tool-call": "assistant", "tool-response": "user"}
 
+
+def _is_cacheable_response(response):
+    """
+    Only cache text pages and JSON API answers: downloads (PDFs, spreadsheets, audio...) stay streamed to disk.
+    """
+    content_type = response.headers.get("content-type", "").lower()
+    return "text/" in content_type or "json" in content_type
+
+
+def build_http_session(cache_backend="sqlite", workers=FETCH_WORKERS):
+    """
+    Create a (cached) requests session with a pooled, retrying adapter to be shared by all web tools.
+    """
+    if cache_backend == "none":
+        session = requests.Session()
+    else:
+        session = requests_cache.CachedSession(
+            WEB_CACHE_NAME,
+            backend=cache_backend,
+            expire_after=WEB_CACHE_EXPIRE_AFTER,
+            allowable_codes=(200,),
+            stale_if_error=True,
+            cache_control=True,
+            filter_fn=_is_cacheable_response,
+        )
+        # Expired responses are never removed automatically, prune them so the cache does not grow without bound
+        session.cache.delete(expired=True)
+    adapter = HTTPAdapter(
+        pool_connections=positive_int_from_env("HTTP_POOL_CONNECTIONS", max(32, workers * 8)),  # Number of hosts kept pooled
+        pool_maxsize=positive_int_from_env("HTTP_POOL_MAXSIZE", max(64, workers * 16)),  # Connections kept per host
+        max_retries=Retry(total=HTTP_MAX_RETRIES, backoff_factor=0.3),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 # ------------------------------ Argument Parsing -------------------------------
 
 def parse_args():
@@ -157,88 +287,159 @@ def parse_args():
         default="o1",
         help="Model identifier (default: o1)"
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        choices=list(IMPORT_PROFILES),
+        default="default",
+        help="Set of imports the agent is authorized to use (default: default)"
+    )
+    parser.add_argument(
+        "--verbosity",
+        type=int,
+        choices=[0, 1, 2],
+        default=2,
+        help="Agent verbosity level (default: 2)"
+    )
+    parser.add_argument(
+        "--cache-backend",
+        type=str,
+        choices=CACHE_BACKENDS,
+        default="sqlite",
+        help="Backend of the HTTP cache used by the web tools, 'none' to disable caching (default: sqlite)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=FETCH_WORKERS,
+        help=f"Number of pages fetched concurrently by the web tools (default: {FETCH_WORKERS})"
+    )
     return parser.parse_args()
 
 # ------------------------------- Agent Creation --------------------------------
 
-def create_agent(model_id="o1"):
+# Shared agent instance, built once per process and reused across requests
+_agent_instance = None
+_agent_lock = threading.Lock()
+
+
+def create_agent(
+    model_id="o1", import_profile="default", verbosity_level=2, cache_backend="sqlite", workers=FETCH_WORKERS
+):
+    """
+    Return the shared agent instance, creating it on first call. Arguments are only used on that first call.
+    """
+    global _agent_instance
+    if _agent_instance is None:
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = _build_agent(
+                    model_id=model_id,
+                    import_profile=import_profile,
+                    verbosity_level=verbosity_level,
+                    cache_backend=cache_backend,
+                    workers=workers,
+                )
+    return _agent_instance
+
+
+def _build_agent(
+    model_id="o1", import_profile="default", verbosity_level=2, cache_backend="sqlite", workers=FETCH_WORKERS
+):
     """
     Create and return an agent instance configured to use the custom MCP server.
     """
-    # Initialize tool collection from the custom MCP server
-    with ToolCollection.from_mcp(server_parameters) as tool_collection:
-        # Define model parameters with optimized settings
-        model_params = {
-            "model_id": model_id,
-            "custom_role_conversions": custom_role_conversions,
-            "max_completion_tokens": 4096,  # Reduced from 8192 for better performance
-            "temperature": 0.7,
-        }
-        if model_id == "o1":
-            model_params["reasoning_effort"] = "high"
-
-        # Initialize the LLM model
-        model = LiteLLMModel(**model_params)
-        logger.info(f"Initialized LiteLLMModel with model_id={model_id}")
-
-        text_limit = 100000  # Define text inspection limit
-
-        # Initialize the web browser with the optimized configuration
-        browser = SimpleTextBrowser(**BROWSER_CONFIG)
-        logger.info("Initialized SimpleTextBrowser with custom configuration.")
-
-        # Define web tools with optimized settings
-        WEB_TOOLS = [
-            GoogleSearchTool(provider="serper"),
-            VisitTool(browser),
-            PageUpTool(browser),
-            PageDownTool(browser),
-            FinderTool(browser),
-            FindNextTool(browser),
-            ArchiveSearchTool(browser),
-            TextInspectorTool(model, text_limit),
-        ]
-        logger.info("Initialized web tools for ToolCallingAgent.")
-
-        # Initialize the ToolCallingAgent with optimized parameters
-        text_webbrowser_agent = ToolCallingAgent(
-            model=model,
-            tools=WEB_TOOLS + tool_collection.tools,  # Combine web tools with MCP tools
-            max_steps=10,             # Reduced from 20
-            verbosity_level=2,        # Set to 2 for detailed logs
-            planning_interval=4,
-            name="search_agent",
-            description=(
-                """A team member that will search the internet to answer your question.
-                Ask all questions that require browsing the web using complete sentences.
-                Provide as much context as possible, especially if searching within a specific timeframe.
-                """
-            ),
-            provide_run_summary=True,
-        )
-        logger.info("Initialized ToolCallingAgent.")
-
-        # Enhance the agent's prompt with additional instructions
-        text_webbrowser_agent.prompt_templates["managed_agent"]["task"] += (
-            """ You can navigate to .txt online files.
-            If a non-HTML page is in another format, especially .pdf or a YouTube video, use the 'inspect_file_as_text' tool to inspect it.
-            Additionally, if more information is needed to answer the question after some searching, use `final_answer` with your request for clarification as an argument."""
-        )
-        logger.debug("Enhanced Agent prompt with additional instructions.")
-
-        # Initialize the manager agent with optimized parameters
-        manager_agent = CodeAgent(
-            model=model,
-            tools=[visualizer, TextInspectorTool(model, text_limit)],
-            max_steps=12,                # Reduced from higher value
-            verbosity_level=2,           # Detailed logs
-            additional_authorized_imports=AUTHORIZED_IMPORTS,
-            planning_interval=4,
-            managed_agents=[text_webbrowser_agent],
-        )
-        logger.info("Initialized Manager CodeAgent.")
+    # Authenticate with Hugging Face Hub
+    hf_token = os.getenv("HF_TOKEN")
+    if hf_token:
+        login(hf_token)
+        logger.info("Logged into Hugging Face Hub.")
+    else:
+        logger.warning("HF_TOKEN not found. Proceeding without authentication.")
+
+    # Define model parameters with optimized settings
+    model_params = {
+        "model_id": model_id,
+        "custom_role_conversions": custom_role_conversions,
+        "max_completion_tokens": 4096,  # Reduced from 8192 for better performance
+        "temperature": 0.7,
+    }
+    if model_id == "o1":
+        model_params["reasoning_effort"] = "high"
+
+    # Connect to the custom MCP server while the LLM model is initialized, keeping the connection open for the
+    # process lifetime
+    tool_collection_context = ToolCollection.from_mcp(server_parameters)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tool_collection_future = executor.submit(tool_collection_context.__enter__)
+        model_future = executor.submit(LiteLLMModel, **model_params)
+        tool_collection = tool_collection_future.result()
+        atexit.register(tool_collection_context.__exit__, None, None, None)
+        model = model_future.result()
+    logger.info(f"Initialized LiteLLMModel with model_id={model_id}")
+
+    text_limit = 100000  # Define text inspection limit
+
+    # Ensure the downloads folder (which also holds the HTTP cache) exists
+    downloads_folder = f"./{BROWSER_CONFIG['downloads_folder']}"
+    if not os.path.isdir(downloads_folder):
+        os.makedirs(downloads_folder, exist_ok=True)
+
+    # Initialize the web browser with the optimized configuration
+    browser = SimpleTextBrowser(
+        **BROWSER_CONFIG, session=build_http_session(cache_backend, workers), page_cache_ttl=WEB_CACHE_EXPIRE_AFTER
+    )
+    logger.info("Initialized SimpleTextBrowser with custom configuration.")
+
+    # Define web tools with optimized settings
+    WEB_TOOLS = [
+        CachedGoogleSearchTool(provider="serper", cache_ttl=WEB_CACHE_EXPIRE_AFTER),
+        VisitTool(browser),
+        BatchVisitTool(browser, max_workers=workers),
+        PageUpTool(browser),
+        PageDownTool(browser),
+        FinderTool(browser),
+        FindNextTool(browser),
+        ArchiveSearchTool(browser),
+        TextInspectorTool(model, text_limit),
+    ]
+    logger.info("Initialized web tools for ToolCallingAgent.")
+
+    # Initialize the ToolCallingAgent with optimized parameters
+    text_webbrowser_agent = ToolCallingAgent(
+        model=model,
+        tools=WEB_TOOLS + tool_collection.tools,  # Combine web tools with MCP tools
+        max_steps=10,             # Reduced from 20
+        verbosity_level=verbosity_level,
+        planning_interval=4,
+        name="search_agent",
+        description=(
+            """A team member that will search the internet to answer your question.
+            Ask all questions that require browsing the web using complete sentences.
+            Provide as much context as possible, especially if searching within a specific timeframe.
+            """
+        ),
+        provide_run_summary=True,
+    )
+    logger.info("Initialized ToolCallingAgent.")
+
+    # Enhance the agent's prompt with additional instructions
+    text_webbrowser_agent.prompt_templates["managed_agent"]["task"] += MANAGED_AGENT_TASK_SUFFIX
+    logger.debug("Enhanced Agent prompt with additional instructions.")
+
+    # Initialize the manager agent with optimized parameters
+    manager_agent = CodeAgent(
+        model=model,
+        tools=[visualizer, TextInspectorTool(model, text_limit)],
+        max_steps=12,                # Reduced from higher value
+        verbosity_level=verbosity_level,
+        additional_authorized_imports=IMPORT_PROFILES[import_profile],
+        planning_interval=4,
+        managed_agents=[text_webbrowser_agent],
+    )
+    logger.info("Initialized Manager CodeAgent.")
 
-        return manager_agent
+    return manager_agent
 
 # ------------------------------- Main Function ---------------------------------
 
@@ -246,7 +447,13 @@ def main():
     args = parse_args()
     logger.info(f"Received question: {args.question} with model_id={args.model_id}")
 
-    agent = create_agent(model_id=args.model_id)
+    agent = create_agent(
+        model_id=args.model_id,
+        import_profile=args.profile,
+        verbosity_level=args.verbosity,
+        cache_backend=args.cache_backend,
+        workers=args.workers,
+    )
 
     answer = agent.run(args.question)
 
@@ -4,21 +4,32 @@ import mimetypes
 import os
 import pathlib
 import re
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple, Union
-from urllib.parse import unquote, urljoin, urlparse
+from urllib.parse import parse_qsl, unquote, urlencode, urljoin, urlparse, urlsplit, urlunsplit
 
 import pathvalidate
 import requests
 from serpapi import GoogleSearch
 
-from smolagents import Tool
+from smolagents import GoogleSearchTool, Tool
 
 from .cookies import COOKIES
 from .mdconvert import FileConversionException, MarkdownConverter, UnsupportedFormatException
 
 
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL (case of scheme and host, query parameter order, fragment) so that equivalent addresses compare equal."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
 class SimpleTextBrowser:
     """(In preview) An extremely simple text-based web browser comparable to Lynx. Suitable for Agentic use."""
 
@@ -29,6 +40,9 @@ class SimpleTextBrowser:
         downloads_folder: Optional[Union[str, None]] = None,
         serpapi_key: Optional[Union[str, None]] = None,
         request_kwargs: Optional[Union[Dict[str, Any], None]] = None,
+        session: Optional[requests.Session] = None,
+        page_cache_ttl: Optional[float] = 3600,
+        page_cache_max_chars: int = 5_000_000,
     ):
         self.start_page: str = start_page if start_page else "about:blank"
         self.viewport_size = viewport_size  # Applies only to the standard uri types
@@ -41,8 +55,17 @@ class SimpleTextBrowser:
         self.serpapi_key = serpapi_key
         self.request_kwargs = request_kwargs
         self.request_kwargs["cookies"] = COOKIES
-        self._mdconvert = MarkdownConverter()
+        # Reuse pooled connections across all fetches made through this browser
+        self.session = session if session is not None else requests.Session()
+        self._mdconvert = MarkdownConverter(requests_session=self.session)
         self._page_content: str = ""
+        # Rendered text pages keyed by canonical URL, so revisits skip the network and the conversion
+        # Entries expire after page_cache_ttl seconds (None: never) and the total cached text is capped in characters
+        self._page_cache: "OrderedDict[str, Tuple[Optional[str], str, float]]" = OrderedDict()
+        self._page_cache_chars = 0
+        self.page_cache_ttl = page_cache_ttl
+        self.page_cache_max_chars = page_cache_max_chars
+        self._page_cache_lock = threading.Lock()
 
         self._find_on_page_query: Union[str, None] = None
         self._find_on_page_last_result: Union[int, None] = None  # Location of the last result
@@ -269,12 +292,19 @@ class SimpleTextBrowser:
                 self.page_title = res.title
                 self._set_page_content(res.text_content)
             else:
+                cache_key = canonicalize_url(url)
+                cached_page = self._get_cached_page(cache_key)
+                if cached_page is not None:
+                    self.page_title, content = cached_page
+                    self._set_page_content(content)
+                    return
+
                 # Prepare the request parameters
                 request_kwargs = self.request_kwargs.copy() if self.request_kwargs is not None else {}
                 request_kwargs["stream"] = True
 
                 # Send a HTTP request to the URL
-                response = requests.get(url, **request_kwargs)
+                response = self.session.get(url, **request_kwargs)
                 response.raise_for_status()
 
                 # If the HTTP request was successful
@@ -285,6 +315,7 @@ class SimpleTextBrowser:
                     res = self._mdconvert.convert_response(response)
                     self.page_title = res.title
                     self._set_page_content(res.text_content)
+                    self._cache_page(cache_key, res.title, res.text_content)
                 # A download
                 else:
                     # Try producing a safe filename
@@ -352,6 +383,57 @@ class SimpleTextBrowser:
                 self.page_title = "Error"
                 self._set_page_content(f"## Error\n\n{str(request_exception)}")
 
+    def fetch_text_page(self, url: str) -> Tuple[Optional[str], str]:
+        """Fetch a text or HTML page and return its title and content. The visit is recorded in the history, but the current page is left unchanged. Safe to call from several threads."""
+        cache_key = canonicalize_url(url)
+        cached_page = self._get_cached_page(cache_key)
+        if cached_page is None:
+            request_kwargs = self.request_kwargs.copy() if self.request_kwargs is not None else {}
+            request_kwargs["stream"] = True
+            with self.session.get(url, **request_kwargs) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get("content-type", "")
+                if "text/" not in content_type.lower():
+                    raise UnsupportedFormatException(
+                        f"Content type '{content_type}' is not a text page, use visit_page instead."
+                    )
+                res = self._mdconvert.convert_response(response)
+            if res is None:
+                raise FileConversionException(f"Could not convert the '{content_type}' content of this page to text.")
+            cached_page = (res.title, res.text_content)
+            self._cache_page(cache_key, *cached_page)
+
+        # Insert before the current address, which must stay the last history entry
+        self.history.insert(-1, (url, time.time()))
+        return cached_page
+
+    def _get_cached_page(self, cache_key: str) -> Union[Tuple[Optional[str], str], None]:
+        with self._page_cache_lock:
+            if cache_key not in self._page_cache:
+                return None
+            title, content, cached_at = self._page_cache[cache_key]
+            if self.page_cache_ttl is not None and time.time() - cached_at > self.page_cache_ttl:
+                self._evict_cached_page(cache_key)
+                return None
+            self._page_cache.move_to_end(cache_key)
+            return title, content
+
+    def _cache_page(self, cache_key: str, title: Optional[str], content: str) -> None:
+        if len(content) > self.page_cache_max_chars:
+            return
+        with self._page_cache_lock:
+            if cache_key in self._page_cache:
+                self._evict_cached_page(cache_key)
+            self._page_cache[cache_key] = (title, content, time.time())
+            self._page_cache_chars += len(content)
+            while self._page_cache_chars > self.page_cache_max_chars:
+                self._evict_cached_page(next(iter(self._page_cache)))
+
+    def _evict_cached_page(self, cache_key: str) -> None:
+        _, content, _ = self._page_cache.pop(cache_key)
+        self._page_cache_chars -= len(content)
+
     def _state(self) -> Tuple[str, str]:
         header = f"Address: {self.address}\n"
         if self.page_title is not None:
@@ -391,6 +473,22 @@ class SearchInformationTool(Tool):
         return header.strip() + "\n=======================\n" + content
 
 
+class CachedGoogleSearchTool(GoogleSearchTool):
+    """GoogleSearchTool that memoizes results per (query, filter_year) for up to cache_ttl seconds, so repeated searches skip the API call."""
+
+    def __init__(self, provider: str = "serpapi", cache_size: int = 128, cache_ttl: float = 3600):
+        super().__init__(provider=provider)
+        self.cache_ttl = cache_ttl
+        self._cached_search = lru_cache(maxsize=cache_size)(self._search)
+
+    def forward(self, query: str, filter_year: Optional[int] = None) -> str:
+        # Results are keyed on the current TTL window as well, so they are refreshed once it has elapsed
+        return self._cached_search(" ".join(query.split()), filter_year, int(time.time() // self.cache_ttl))
+
+    def _search(self, query: str, filter_year: Optional[int], ttl_window: int) -> str:
+        return super().forward(query, filter_year)
+
+
 class VisitTool(Tool):
     name = "visit_page"
     description = "Visit a webpage at a given URL and return its text. Given a url to a YouTube video, this returns the transcript."
@@ -407,6 +505,48 @@ class VisitTool(Tool):
         return header.strip() + "\n=======================\n" + content
 
 
+class BatchVisitTool(Tool):
+    name = "visit_pages"
+    description = "Visit several webpages at once and return the beginning of the text of each. Use this instead of successive visit_page calls when you already know which urls you want to read; use visit_page to read further into one of them."
+    inputs = {
+        "urls": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "The absolute urls of the webpages to visit, for instance the links returned by a web search.",
+        }
+    }
+    output_type = "string"
+
+    def __init__(self, browser, max_workers: int = 8):
+        super().__init__()
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be a positive integer, got {max_workers}.")
+        self.browser = browser
+        self.max_workers = max_workers
+
+    def forward(self, urls: List[str]) -> str:
+        # Tool calls with non-dict arguments pass a single url as a bare string
+        if isinstance(urls, str):
+            urls = [urls]
+        if len(urls) == 0:
+            raise Exception("Provide at least one url to visit.")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            pages = list(executor.map(self._visit, urls))
+        return "\n\n".join(pages)
+
+    def _visit(self, url: str) -> str:
+        try:
+            title, content = self.browser.fetch_text_page(url)
+        except Exception as e:
+            return f"Address: {url}\n=======================\nCould not fetch this page: {e}"
+        header = f"Address: {url}\n"
+        if title is not None:
+            header += f"Title: {title}\n"
+        if len(content) > self.browser.viewport_size:
+            header += "Showing the first page only, use visit_page to read the rest.\n"
+        return header.strip() + "\n=======================\n" + content[: self.browser.viewport_size]
+
+
 class DownloadTool(Tool):
     name = "download_file"
     description = """
@@ -423,7 +563,7 @@ DO NOT use this tool for .pdf or .txt or .htm files: for these types of files us
     def forward(self, url: str) -> str:
         if "arxiv" in url:
             url = url.replace("abs", "pdf")
-        response = requests.get(url)
+        response = self.browser.session.get(url)
         content_type = response.headers.get("content-type", "")
         extension = mimetypes.guess_extension(content_type)
         if extension and isinstance(extension, str):
@@ -459,8 +599,8 @@ class ArchiveSearchTool(Tool):
     def forward(self, url, date) -> str:
         no_timestamp_url = f"https://archive.org/wayback/available?url={url}"
         archive_url = no_timestamp_url + f"&timestamp={date}"
-        response = requests.get(archive_url).json()
-        response_notimestamp = requests.get(no_timestamp_url).json()
+        response = self.browser.session.get(archive_url).json()
+        response_notimestamp = self.browser.session.get(no_timestamp_url).json()
         if "archived_snapshots" in response and "closest" in response["archived_snapshots"]:
             closest = response["archived_snapshots"]["closest"]
             print("Archive found!", closest)